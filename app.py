@@ -1,7 +1,19 @@
 import os
+import re
+import errno
+import tempfile
 import platform
-import subprocess
+import shutil
+import hashlib
+import html
+import secrets
+import urllib.parse
+import time
+import types
+import threading
+import queue
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import streamlit as st
@@ -12,139 +24,457 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ----------------- Paths (no folder/export UI) -----------------
+# Streamlit re-executes this script on every rerun, so cache across runs rather than per import
+@st.cache_resource(show_spinner=False)
 def target_dir() -> Path:
-    if os.name != "nt":  # Linux/macOS (Streamlit Cloud)
-        p = Path("/tmp"); p.mkdir(parents=True, exist_ok=True); return p
-    p = Path.cwd() / "downloads"; p.mkdir(parents=True, exist_ok=True); return p
+    p = Path("/tmp") if os.name != "nt" else Path.cwd() / "downloads"  # Linux/macOS (Streamlit Cloud)
+    try:
+        os.stat(p)
+    except FileNotFoundError:
+        p.mkdir(parents=True, exist_ok=True)
+    return p
 
 TARGET_DIR = target_dir()
+TMP_PREFIX = "ytdl_"
+MAX_FILE_AGE = 60 * 60  # seconds a finished download is kept around
+
+def session_dir() -> Path:
+    """Per-session folder under /tmp (emptied by reap_stale_files once stale); downloads/ on Windows."""
+    if os.name == "nt":
+        return TARGET_DIR
+    if "tmpdir" not in st.session_state:
+        st.session_state.tmpdir = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=TARGET_DIR)
+    p = Path(st.session_state.tmpdir)
+    p.mkdir(exist_ok=True)  # may have been reaped while the session sat idle
+    return p
+
+def reap_stale_files():
+    """Delete downloads older than MAX_FILE_AGE from all session folders and ./static,
+    so long-running containers don't fill up /tmp."""
+    cutoff = time.time() - MAX_FILE_AGE
+    roots = [str(STATIC_DIR)]
+    if os.name != "nt":
+        with os.scandir(TARGET_DIR) as it:
+            roots += [e.path for e in it if e.name.startswith(TMP_PREFIX) and e.is_dir(follow_symlinks=False)]
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root, topdown=False):
+            for fn in filenames:
+                fp = os.path.join(dirpath, fn)
+                try:
+                    if os.stat(fp).st_mtime < cutoff:
+                        os.unlink(fp)
+                except OSError:
+                    pass
+            if dirpath != str(STATIC_DIR):
+                try:
+                    os.rmdir(dirpath)  # only succeeds once empty
+                except OSError:
+                    pass
 
 # ----------------- FFmpeg check -----------------
+SYSTEM = platform.system()
+WINDOWS_FFMPEG_CANDIDATES = (
+    Path.cwd() / "ffmpeg.exe",
+    Path.cwd() / "ffmpeg" / "bin" / "ffmpeg.exe",
+    Path.home() / "ffmpeg" / "bin" / "ffmpeg.exe",
+)
+
+@st.cache_resource(show_spinner=False)
 def check_ffmpeg() -> str | None:
-    try:
-        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
-        return "ffmpeg"
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        if platform.system() == "Windows":
-            for p in [
-                Path.cwd() / "ffmpeg.exe",
-                Path.cwd() / "ffmpeg" / "bin" / "ffmpeg.exe",
-                Path.home() / "ffmpeg" / "bin" / "ffmpeg.exe",
-            ]:
-                if p.exists(): return str(p)
-        return None
+    # PATH lookup only stats candidates; no need to spawn `ffmpeg -version`
+    p = shutil.which("ffmpeg")
+    if p: return p
+    if SYSTEM == "Windows":
+        for p in WINDOWS_FFMPEG_CANDIDATES:
+            if p.exists(): return str(p)
+    return None
+
+FFMPEG_HELP = {
+    "Windows": ("**Windows:** download zip from https://www.gyan.dev/ffmpeg/builds/ (essentials), "
+                "extract, and put `bin/ffmpeg.exe` next to this app. Or `choco install ffmpeg`."),
+    "Darwin": "**macOS:** `brew install ffmpeg`",
+    "Linux": "**Linux:** `sudo apt update && sudo apt install -y ffmpeg`",
+}
 
 def show_ffmpeg_instructions():
     st.error("❌ FFmpeg not found.")
-    sys = platform.system()
-    if sys == "Windows":
-        st.markdown("**Windows:** download zip from https://www.gyan.dev/ffmpeg/builds/ (essentials), "
-                    "extract, and put `bin/ffmpeg.exe` next to this app. Or `choco install ffmpeg`.")
-    elif sys == "Darwin":
-        st.markdown("**macOS:** `brew install ffmpeg`")
-    else:
-        st.markdown("**Linux:** `sudo apt update && sudo apt install -y ffmpeg`")
+    st.markdown(FFMPEG_HELP.get(SYSTEM, FFMPEG_HELP["Linux"]))
     st.stop()
 
+# ----------------- aria2c check (probed once) -----------------
+@st.cache_resource(show_spinner=False)
+def check_aria2c() -> str | None:
+    return shutil.which("aria2c")
+
+ARIA2C_PATH = check_aria2c()
+
+# ----------------- Static file serving -----------------
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+STATIC_MAX_BYTES = 200 * 1024 * 1024  # Streamlit's static handler refuses larger files
+
+def publish_static(path: str, size: int) -> str | None:
+    """Hard-link (or, across filesystems, copy) a finished file under ./static and return
+    its URL, or None when static serving is off, the file is too large, or publishing fails."""
+    if size > STATIC_MAX_BYTES or not st.get_option("server.enableStaticServing"):
+        return None
+    name = os.path.basename(path)
+    # Random subfolder so other visitors can't guess the URL from the video title
+    dst = STATIC_DIR / secrets.token_urlsafe(12) / name
+    try:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(path, dst)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # /tmp is usually another filesystem on Cloud; copyfile uses os.sendfile on Linux,
+            # so the bytes never pass through Python
+            shutil.copyfile(path, dst)
+    except OSError as e:
+        logger.warning(f"Static publish failed, falling back to download_button: {e}")
+        return None
+    return f"app/static/{dst.parent.name}/{urllib.parse.quote(name)}"
+
 # ----------------- yt-dlp session builder -----------------
+UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+      "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+
+# Options shared by every download, built once at import; make_opts only layers per-click overrides
+_base_opts = {
+    "quiet": False,
+    "no_warnings": False,
+    "progress": True,
+    "prefer_ffmpeg": True,
+    "noplaylist": True,
+    "playlist_items": "1",
+    "retries": 10,
+    "fragment_retries": 10,
+    "http_chunk_size": 10 * 1024 * 1024,  # ranged 10 MiB requests dodge YouTube's per-connection throttling
+    "buffersize": 1024 * 1024,
+    "skip_unavailable_fragments": True,
+    "geo_bypass": True,
+    "updatetime": False,  # keep real mtimes so reap_stale_files sees fresh downloads as fresh
+    "postprocessor_args": {"ffmpeg": ["-threads", str(os.cpu_count() or 2)]},
+    "http_headers": {
+        "User-Agent": UA,
+        "Referer": "https://www.youtube.com/",
+        "Accept-Language": "en-US,en;q=0.9",
+    },
+}
+BASE_OPTS = types.MappingProxyType(_base_opts)
+
+# Opt-in: yt-dlp only reports "finished" for external downloaders, so there is no
+# progress, title or Cancel until the whole transfer is done
+ARIA2C_OPTS = types.MappingProxyType({
+    "external_downloader": "aria2c",
+    "external_downloader_args": {
+        "aria2c": ["-x", "16", "-s", "16", "-k", "1M", "--file-allocation=none"],
+    },
+})
+
+# Audio choices, cheapest first: "original" and "m4a" (from an AAC source) only remux;
+# mp3 is a full libmp3lame encode, done as VBR -q:a 4 which is faster than CBR 192k
+AUDIO_FORMATS = {
+    "original": "bestaudio/best",
+    "m4a": "bestaudio[ext=m4a]/bestaudio/best",
+    "mp3": "bestaudio/best",
+}
+AUDIO_POSTPROCESSORS = {
+    "original": {"key": "FFmpegExtractAudio", "preferredcodec": "best"},
+    "m4a": {"key": "FFmpegExtractAudio", "preferredcodec": "m4a", "preferredquality": "0"},
+    "mp3": {"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": "4"},
+}
+
+# Format selector per quality choice (None = best), built once instead of per click
+VIDEO_FORMATS = {
+    None: "bestvideo+bestaudio/best",
+    **{q: f"bestvideo[height<={q}]+bestaudio/best[height<={q}]" for q in (240, 360, 480, 720, 1080)},
+}
+
+def format_tag(download_type: str, quality: int | None, audio_format: str) -> str:
+    return f"audio-{audio_format}" if download_type == "audio" else f"video-{quality or 'best'}"
+
 def make_opts(ffmpeg_path: str, download_type: str, quality: int | None,
-              cookie_path: Path | None, player_client: str):
-    UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-          "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+              cookie_path: Path | None, player_client: str, fragments: int = 8,
+              audio_format: str = "original", use_aria2c: bool = False):
     opts = {
-        "outtmpl": str(TARGET_DIR / "%(title)s.%(ext)s"),
-        "quiet": False,
-        "no_warnings": False,
-        "progress": True,
-        "prefer_ffmpeg": True,
-        "noplaylist": True,
-        "playlist_items": "1",
-        "retries": 10,
-        "fragment_retries": 10,
-        "concurrent_fragment_downloads": 1,
-        "skip_unavailable_fragments": True,
-        "geo_bypass": True,
-        "http_headers": {
-            "User-Agent": UA,
-            "Referer": "https://www.youtube.com/",
-            "Accept-Language": "en-US,en;q=0.9",
-        },
-        "extractor_args": {"youtube": {"player_client": player_client}},
+        **BASE_OPTS,
+        # Relative template: the per-session folder is set as paths["home"] at download time,
+        # so it stays out of the get_ydl cache key. Id and tag keep each format in its own file,
+        # otherwise yt-dlp would hand back an earlier quality as "already downloaded"
+        "outtmpl": f"%(title)s [%(id)s] {format_tag(download_type, quality, audio_format)}.%(ext)s",
+        "concurrent_fragment_downloads": fragments,
+        "extractor_args": {"youtube": {"player_client": [player_client]}},
     }
+    if use_aria2c and ARIA2C_PATH:
+        opts.update(ARIA2C_OPTS)
     if cookie_path:
         opts["cookiefile"] = str(cookie_path)
-    if ffmpeg_path != "ffmpeg":
-        opts["ffmpeg_location"] = ffmpeg_path
+    opts["ffmpeg_location"] = ffmpeg_path
 
     if download_type == "audio":
         opts.update({
-            "format": "bestaudio/best",
-            "postprocessors": [{
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }],
+            "format": AUDIO_FORMATS[audio_format],
+            "postprocessors": [AUDIO_POSTPROCESSORS[audio_format]],
         })
     else:
-        if quality:
-            opts.update({
-                "format": f"bestvideo[height<={quality}]+bestaudio/best[height<={quality}]",
-                "merge_output_format": "mp4",
-            })
-        else:
-            opts.update({
-                "format": "bestvideo+bestaudio/best",
-                "merge_output_format": "mp4",
-            })
+        opts.update({
+            "format": VIDEO_FORMATS[quality],
+            "merge_output_format": "mp4",
+        })
     return opts
 
+# ----------------- Metadata (cached per url/client) -----------------
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_info(url: str, player_client: str, cookiefile: str | None = None) -> dict:
+    opts = {"quiet": True, "noplaylist": True,
+            "extractor_args": {"youtube": {"player_client": [player_client]}}}
+    if cookiefile:
+        opts["cookiefile"] = cookiefile
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        return ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+# Player clients raced against each other; the first to return metadata wins
+PLAYER_CLIENTS = ("android", "web", "ios")
+@st.cache_resource(show_spinner=False)
+def info_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=len(PLAYER_CLIENTS), thread_name_prefix="fetch_info")
+
+def fetch_infos(url: str, cookiefile: str | None = None):
+    """Yield (client, info, error) for each player client as its metadata fetch completes."""
+    futures = {info_pool().submit(fetch_info, url, c, cookiefile): c for c in PLAYER_CLIENTS}
+    try:
+        for fut in as_completed(futures):
+            try:
+                yield futures[fut], fut.result(), None
+            except Exception as e:
+                yield futures[fut], None, e
+    finally:
+        for fut in futures:
+            fut.cancel()
+
+# ----------------- Reusable YoutubeDL sessions -----------------
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_ydl(opts: dict) -> types.SimpleNamespace:
+    """One long-lived YoutubeDL per distinct options, so repeat downloads reuse its
+    HTTP handlers and player cache. Callers swap their hooks in while holding `lock`."""
+    session = types.SimpleNamespace(lock=threading.Lock(), progress_hook=None, pp_hook=None)
+    session.ydl = yt_dlp.YoutubeDL({
+        **opts,
+        "progress_hooks": [lambda d: session.progress_hook and session.progress_hook(d)],
+        "postprocessor_hooks": [lambda d: session.pp_hook and session.pp_hook(d)],
+    })
+    return session
+
+# ----------------- Finished files -----------------
+VIDEO_ID_RE = re.compile(r"(?:v=|youtu\.be/|shorts/|live/|embed/)([A-Za-z0-9_-]{11})")
+
+def extract_video_id(url: str) -> str | None:
+    m = VIDEO_ID_RE.search(url)
+    return m.group(1) if m else None
+
+def offer_download(path: str, size: int):
+    size_mb = size / (1024 * 1024)
+    name = os.path.basename(path)
+    static_url = publish_static(path, size)
+    if static_url:
+        # Browser fetches straight from the static handler (Range support, no in-memory copy)
+        st.markdown(f'<a href="{static_url}" download="{html.escape(name)}">'
+                    f'⬇️ Download {html.escape(name)} ({size_mb:.1f} MB)</a>',
+                    unsafe_allow_html=True)
+        return
+    # download_button reads the file while marshalling, so the handle can be closed right after
+    with open(path, "rb") as fobj:
+        st.download_button(
+            label=f"⬇️ Download {name} ({size_mb:.1f} MB)",
+            data=fobj,
+            file_name=name,
+            mime="application/octet-stream",
+        )
+
+@st.cache_resource(show_spinner=False)
+def download_pool() -> ThreadPoolExecutor:
+    # One pool per server process, not per rerun, so max_workers really caps concurrent downloads
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="download")
+
 # ----------------- Core download (with 403 failover) -----------------
 def download_content(url: str, download_type: str = "video", quality: int | None = None,
-                     cookie_path: Path | None = None) -> bool:
+                     cookie_path: Path | None = None, fragments: int = 8,
+                     audio_format: str = "original", show_metadata: bool = False,
+                     out_dir: Path = TARGET_DIR, use_aria2c: bool = False) -> bool:
     ffmpeg_path = check_ffmpeg()
     if not ffmpeg_path:
         show_ffmpeg_instructions()
         return False
 
+    # Same video/format already fetched in this session: serve the file we have
+    finished = st.session_state.setdefault("finished_downloads", {})
+    cache_key = (extract_video_id(url) or url, format_tag(download_type, quality, audio_format))
+    if cache_key in finished:
+        try:
+            size = os.stat(finished[cache_key]).st_size
+        except OSError:
+            size = 0
+        if size > 0:
+            st.write(f"♻️ Already downloaded in this session: {os.path.basename(finished[cache_key])}")
+            offer_download(finished[cache_key], size)
+            return True
+        del finished[cache_key]
+
+    # One widget for bar + status text: each update is a single websocket message
     progress_bar = st.progress(0.0)
-    status_text = st.empty()
+    # yt-dlp runs on a worker thread; its hooks post UI updates here and check `cancel`
+    events = queue.Queue()
+    cancel = threading.Event()
+
+    def on_cancel():
+        cancel.set()
+        st.toast("⏹️ Download cancelled.")
+
+    # Only shown while a worker is running; a click after that would just rerun and drop the link
+    cancel_slot = st.empty()
     downloaded_file = None
+    last_ts, last_frac, last_pct = 0.0, 0.0, -1
+    title_shown = False
+
+    def post_title(info_dict):
+        # First hook event of any kind: already-present files and external downloaders
+        # never send "downloading"
+        nonlocal title_shown
+        if not title_shown:
+            title_shown = True
+            events.put(("write", f"📥 Starting download for: {info_dict.get('title', 'Unknown')}"))
 
     def hook(d):
-        nonlocal downloaded_file
+        nonlocal downloaded_file, last_ts, last_frac, last_pct
+        if cancel.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Cancelled by user")
         try:
+            post_title(d.get("info_dict", {}))
             if d["status"] == "downloading":
                 total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
                 downloaded = d.get("downloaded_bytes", 0)
-                if total: progress_bar.progress(min(downloaded / total, 1.0))
-                status_text.text(f"⏳ Downloading: {os.path.basename(d.get('filename',''))}")
+                frac = min(downloaded / total, 1.0) if total else last_frac
+                # Each UI call is a websocket message: only send when the whole percent
+                # changes, or every 250 ms so the label still moves when the size is unknown
+                now, pct = time.monotonic(), int(frac * 100)
+                if pct == last_pct and now - last_ts < 0.25:
+                    return
+                last_ts, last_frac, last_pct = now, frac, pct
+                events.put(("progress", frac, f"⏳ Downloading: {os.path.basename(d.get('filename',''))}"))
             elif d["status"] == "finished":
                 downloaded_file = d.get("filename", "")
-                status_text.text(f"✅ Processing: {os.path.basename(downloaded_file or '')}")
-                progress_bar.progress(1.0)
+                events.put(("progress", 1.0, f"✅ Processing: {os.path.basename(downloaded_file or '')}"))
         except Exception as e:
             logger.warning(f"Progress hook error: {e}")
 
-    # Try android client first, then web (helps some 403 cases)
-    for client in ("android", "web"):
+    def pp_hook(d):
+        # Merging/extracting replaces the downloaded file, so track the final path
+        nonlocal downloaded_file
+        if cancel.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Cancelled by user")
+        post_title(d.get("info_dict", {}))
+        if d["status"] == "started" and d.get("postprocessor") not in (None, "MoveFiles"):
+            events.put(("progress", 1.0, f"⚙️ Post-processing ({d['postprocessor']}) with FFmpeg..."))
+        elif d["status"] == "finished":
+            downloaded_file = d.get("info_dict", {}).get("filepath") or downloaded_file
+
+    def show(event):
+        if event[0] == "write":
+            st.write(event[1])
+        else:
+            progress_bar.progress(event[1], text=event[2])
+
+    def fetch(ydl, info):
+        if info is None:
+            ydl.extract_info(url, download=True)
+        else:
+            # Reuse the cached metadata instead of re-extracting inside download()
+            ydl.process_ie_result(info, download=True)
+
+    def run(session, opts, info):
+        if cancel.is_set():  # orphaned before it got a worker
+            raise yt_dlp.utils.DownloadCancelled("Cancelled by user")
+        if not session.lock.acquire(blocking=False):
+            # Cached instance is busy with another user: don't queue behind them, use a throwaway one
+            with yt_dlp.YoutubeDL({**opts, "paths": {"home": str(out_dir)},
+                                   "progress_hooks": [hook], "postprocessor_hooks": [pp_hook]}) as ydl:
+                fetch(ydl, info)
+            return
+        try:
+            if cancel.is_set():
+                raise yt_dlp.utils.DownloadCancelled("Cancelled by user")
+            session.progress_hook, session.pp_hook = hook, pp_hook
+            session.ydl.params["paths"] = {"home": str(out_dir)}
+            try:
+                fetch(session.ydl, info)
+            finally:
+                session.progress_hook = session.pp_hook = None
+        finally:
+            session.lock.release()
+
+    if show_metadata:
+        # Fetch metadata with every client at once, download with whichever answers first
+        # (falling back to the others on 403)
+        attempts = fetch_infos(url, str(cookie_path) if cookie_path else None)
+    else:
+        # No preflight: extract and download in one pass, title comes from the progress hook
+        attempts = ((client, None, None) for client in PLAYER_CLIENTS)
+
+    meta_error = None
+    for client, info, err in attempts:
+        if err is not None:
+            logger.warning(f"Metadata fetch failed on client '{client}': {err}")
+            if "403" not in str(err) and meta_error is None:
+                meta_error = err
+            continue
         try:
-            opts = make_opts(ffmpeg_path, download_type, quality, cookie_path, client)
-            opts["progress_hooks"] = [hook]
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+            opts = make_opts(ffmpeg_path, download_type, quality, cookie_path, client, fragments,
+                             audio_format, use_aria2c)
+            session = get_ydl(opts)
+            if info is not None:
                 st.write(f"📥 Starting download for: {info.get('title', 'Unknown')} (client: {client})")
-                ydl.download([url])
-
-                if downloaded_file and os.path.exists(downloaded_file):
-                    size_mb = os.path.getsize(downloaded_file) / (1024 * 1024)
-                    fobj = open(downloaded_file, "rb")  # stream (no big RAM hit)
-                    st.download_button(
-                        label=f"⬇️ Download {os.path.basename(downloaded_file)} ({size_mb:.1f} MB)",
-                        data=fobj,
-                        file_name=os.path.basename(downloaded_file),
-                        mime="application/octet-stream",
-                    )
-                    return True
+                title_shown = True
+            # The script thread only pumps UI updates, so Streamlit stays responsive
+            last_progress = ("progress", 0.0, "🕒 Queued: waiting for a free download slot...")
+            show(last_progress)
+            fut = download_pool().submit(run, session, opts, info)
+            cancel_slot.button("✖️ Cancel", on_click=on_cancel, key=f"cancel_{client}")
+            try:
+                sent = time.monotonic()
+                while True:
+                    try:
+                        event = events.get(timeout=0.1)
+                    except queue.Empty:
+                        if fut.done():
+                            break
+                        # Streamlit only notices a pending rerun (e.g. Cancel) while sending a
+                        # message, so keep re-sending during FFmpeg runs and network stalls
+                        if time.monotonic() - sent >= 0.5:
+                            show(last_progress)
+                            sent = time.monotonic()
+                        continue
+                    if event[0] == "progress":
+                        last_progress = event
+                    show(event)
+                    sent = time.monotonic()
+                while not events.empty():
+                    show(events.get_nowait())
+                cancel_slot.empty()
+            except BaseException:
+                # Script run interrupted (Cancel or any other rerun): stop the orphaned download
+                cancel.set()
+                raise
+            fut.result()  # re-raise anything the download hit
+
+            try:
+                size = os.stat(downloaded_file).st_size if downloaded_file else None
+            except OSError:
+                size = None
+            if size is not None:
+                finished[cache_key] = downloaded_file
+                offer_download(downloaded_file, size)
+                return True
         except yt_dlp.utils.DownloadError as e:
             # If it's a 403, try next client; otherwise show details
             if "403" in str(e):
@@ -158,7 +488,12 @@ def download_content(url: str, download_type: str = "video", quality: int | None
             logger.error(f"Download error: {e}")
             return False
 
-    # If both clients failed (likely IP/age/region/member restriction)
+    if meta_error is not None:
+        st.error(f"❌ Download failed: {meta_error}")
+        logger.error(f"yt-dlp error: {meta_error}")
+        return False
+
+    # If every client failed (likely IP/age/region/member restriction)
     st.error("❌ Download failed: HTTP 403 (Forbidden).")
     with st.expander("Troubleshoot 403 / Forbidden"):
         st.markdown(
@@ -169,6 +504,13 @@ def download_content(url: str, download_type: str = "video", quality: int | None
     return False
 
 # ----------------- UI -----------------
+# Plain prefix match rejects non-YouTube links before yt-dlp walks its extractor list
+YT_PREFIXES = tuple(
+    scheme + host
+    for scheme in ("https://", "http://", "")
+    for host in ("www.youtube.com/", "youtube.com/", "m.youtube.com/", "music.youtube.com/", "youtu.be/")
+)
+
 def main():
     st.set_page_config(page_title="YouTube Downloader", page_icon="🎥", layout="wide")
     st.title("🎥 YouTube Downloader")
@@ -180,29 +522,63 @@ def main():
     cookie_upload = st.sidebar.file_uploader("Upload cookies.txt", type=["txt"])
     cookie_path = None
     if cookie_upload:
-        cookie_path = (Path("/tmp") / "cookies.txt") if os.name != "nt" else (Path.cwd() / "cookies.txt")
-        with open(cookie_path, "wb") as f:
-            f.write(cookie_upload.read())
+        # Name by content: cached YoutubeDL sessions (which parse the jar once) and cached
+        # metadata are keyed on the path, so a new upload gets a fresh jar and reruns skip the write
+        digest = hashlib.sha256(cookie_upload.getvalue()).hexdigest()[:16]
+        # These are credentials: keep them in the session folder so the reaper removes them
+        # (downloads/ on Windows, away from the checkout)
+        cookie_path = session_dir() / f"cookies-{digest}.txt"
+        previous = st.session_state.get("cookie_path")
+        if previous and previous != cookie_path:
+            previous.unlink(missing_ok=True)  # replaced by a new upload
+        st.session_state.cookie_path = cookie_path
+        if cookie_path.exists():
+            cookie_path.touch()  # still in use: don't let the reaper see it as stale
+        else:
+            cookie_upload.seek(0)
+            with open(cookie_path, "wb") as f:
+                shutil.copyfileobj(cookie_upload, f, 1 << 20)
         st.sidebar.success(f"Cookies loaded: {cookie_path}")
 
+    # Download speed
+    st.sidebar.header("Performance")
+    fragments = st.sidebar.slider("Parallel fragments", 1, 16, 8,
+                                  help="Fragments of HLS/DASH streams fetched at once. Lower on slow links.")
+    audio_format = st.sidebar.radio("Audio format", list(AUDIO_FORMATS),
+                                    format_func={"original": "Original (fastest)", "m4a": "M4A",
+                                                 "mp3": "MP3 (re-encode, slower)"}.get,
+                                    help="Original and M4A keep YouTube's audio without transcoding.")
+    show_metadata = st.sidebar.checkbox("Show metadata before download", value=False,
+                                        help="Fetches the video info first (one extra round trip).")
+    use_aria2c = ARIA2C_PATH is not None and st.sidebar.checkbox(
+        "Use aria2c (multi-connection)", value=False,
+        help="Often faster on throttled links, but progress, title and Cancel are unavailable "
+             "until the download has finished.")
+
     with st.form("download_form"):
         url = st.text_input("🔗 YouTube URL")
         c1, c2 = st.columns(2)
         with c1:
             dtype = st.selectbox("📥 Download Type", ["video", "audio"])
         with c2:
-            q = st.selectbox("🎬 Video Quality", [None, 240, 360, 480, 720, 1080],
+            q = st.selectbox("🎬 Video Quality", list(VIDEO_FORMATS),
                              format_func=lambda x: "Best" if x is None else f"{x}p") if dtype == "video" else None
         submitted = st.form_submit_button("⬇️ Download")
 
     if submitted:
-        if not url.strip():
+        url = url.strip()
+        if not url:
             st.error("⚠️ Please enter a YouTube URL")
+        elif not url.startswith(YT_PREFIXES):
+            st.error("⚠️ Not a YouTube URL")
         else:
+            reap_stale_files()
             with st.spinner("Processing download..."):
-                ok = download_content(url.strip(), dtype, q, cookie_path=cookie_path)
+                ok = download_content(url, dtype, q, cookie_path=cookie_path, fragments=fragments,
+                                      audio_format=audio_format, show_metadata=show_metadata,
+                                      out_dir=session_dir(), use_aria2c=use_aria2c)
             if ok:
-                st.button("🔄 Download Another", on_click=st.rerun)
+                st.button("🔄 Download Another")  # clicking any button already triggers a rerun
 
 if __name__ == "__main__":
     main()